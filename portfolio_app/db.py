@@ -1,10 +1,49 @@
-from sqlalchemy import create_engine, text, inspect
+import os
+
+from sqlalchemy import create_engine, event, text, inspect
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import QueuePool
+
+# Anchor the database at the repo root regardless of working directory, so
+# the documented dev run (`python portfolio_app/app.py` from the root) and a
+# gunicorn --chdir launch open the same file. app.py does the same for
+# users.db.
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_URL = f"sqlite:///{os.path.join(_ROOT_DIR, 'app.db')}"
+
+# An explicit QueuePool replaces SQLAlchemy's SQLite default, which funnels
+# every thread through one connection. With WAL mode, pooled connections let
+# threads read concurrently, and begin_tx() checks out a warm connection with
+# its PRAGMAs already applied instead of opening a fresh one.
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    future=True,
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=10,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    pool_pre_ping=True,
+)
 
-DATABASE_URL = "sqlite:///app.db"
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    """Tune every new SQLite connection for small concurrent OLTP commits.
+
+    WAL + synchronous=NORMAL halves the fsyncs per commit and lets readers
+    run against a snapshot while a write is in flight; the rest keeps temp
+    structures and hot pages in memory and waits on locks instead of failing.
+    """
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA cache_size=-20000")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.close()
 SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False))
 
 class Base(DeclarativeBase):
@@ -14,8 +53,13 @@ def init_db() -> None:
     from models import Base as ModelsBase  # noqa: F401
     Base.metadata.create_all(bind=engine)
 
-    # Ensure existing databases include new columns/constraints
+    # Ensure existing databases include new columns/constraints.  The whole
+    # block is gated on PRAGMA user_version so startups after the first pay a
+    # single integer read instead of a dozen PRAGMA introspection queries.
     with engine.begin() as conn:
+        ver = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        if ver >= 1:
+            return
         insp = inspect(conn)
         if insp.has_table("equity_history"):
             columns = [col["name"] for col in insp.get_columns("equity_history")]
@@ -100,3 +144,5 @@ def init_db() -> None:
                         "CREATE UNIQUE INDEX uix_equity_history_user_date ON equity_history (user_id, date)"
                     )
                 )
+
+        conn.exec_driver_sql("PRAGMA user_version = 1")
@@ -13,6 +13,7 @@ from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
     Boolean,
+    func,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -25,7 +26,7 @@ class Position(Base):
     shares: Mapped[Decimal] = mapped_column(Numeric(18, 6))
     avg_price: Mapped[Decimal] = mapped_column(Numeric(18, 6))
     stop_loss: Mapped[Decimal | None] = mapped_column(Numeric(18, 6), nullable=True)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
 
 class Trade(Base):
     __tablename__ = "trades"
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import threading
 from contextlib import contextmanager
-from datetime import date, datetime, UTC
+from datetime import date
 from decimal import Decimal
 from typing import Iterable
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, delete, event, lambda_stmt
 from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 
@@ -15,6 +16,9 @@ from models import Position, Trade, CashLedger, EquityHistory, Setting
 @contextmanager
 def begin_tx() -> Iterable[Session]:
     session = SessionLocal()
+    # Scoped sessions are reused per thread; drop any balance cached by a
+    # previous transaction so this one starts from the ledger.
+    session.info.pop("_cash_balance", None)
     try:
         yield session
         session.commit()
@@ -28,19 +32,34 @@ def get_positions(session: Session) -> list[Position]:
     return session.execute(select(Position).order_by(Position.ticker)).scalars().all()
 
 def get_position(session: Session, ticker: str) -> Position | None:
-    return session.execute(select(Position).where(Position.ticker == ticker)).scalar_one_or_none()
+    # lambda_stmt caches the construct + compilation across calls; the trade
+    # loops hit this lookup per ticker, so only the bound value changes.
+    stmt = lambda_stmt(lambda: select(Position).where(Position.ticker == ticker))
+    return session.execute(stmt).scalar_one_or_none()
 
-def upsert_position(session: Session, ticker: str, shares: Decimal, avg_price: Decimal, stop_loss: Decimal | None) -> Position:
-    pos = get_position(session, ticker)
-    if pos is None:
-        pos = Position(ticker=ticker, shares=shares, avg_price=avg_price, stop_loss=stop_loss)
-        session.add(pos)
-    else:
-        pos.shares = shares
-        pos.avg_price = avg_price
-        pos.stop_loss = stop_loss
-        pos.updated_at = datetime.now(UTC)
-    return pos
+def upsert_position(session: Session, ticker: str, shares: Decimal, avg_price: Decimal, stop_loss: Decimal | None) -> None:
+    # Native ON CONFLICT upsert: one statement instead of SELECT-then-mutate,
+    # matching upsert_equity. Expire any cached instance so ORM reads in the
+    # same transaction see the new values.
+    stmt = insert(Position).values(
+        ticker=ticker,
+        shares=shares,
+        avg_price=avg_price,
+        stop_loss=stop_loss,
+        # ON CONFLICT bypasses the ORM onupdate hook, so stamp server-side.
+        updated_at=func.now(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Position.ticker],
+        set_={
+            "shares": stmt.excluded.shares,
+            "avg_price": stmt.excluded.avg_price,
+            "stop_loss": stmt.excluded.stop_loss,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    session.execute(stmt)
+    session.expire_all()
 
 def delete_position(session: Session, ticker: str) -> None:
     pos = get_position(session, ticker)
@@ -56,10 +75,106 @@ def log_trade(session: Session, side: str, ticker: str, shares: Decimal, price:
 def apply_cash(session: Session, delta: Decimal, kind: str, ref_trade_id: int | None = None) -> CashLedger:
     ledger = CashLedger(delta=delta, kind=kind, ref_trade_id=ref_trade_id)
     session.add(ledger)
+    cached = session.info.get("_cash_balance")
+    if cached is not None:
+        session.info["_cash_balance"] = cached + delta
     return ledger
 
 def get_cash_balance(session: Session) -> Decimal:
-    return session.execute(select(func.coalesce(func.sum(CashLedger.delta), 0))).scalar_one()
+    # The ledger sum is a full-table scan that trade flows run several times
+    # per transaction; cache it on the session and let apply_cash keep the
+    # cached value current incrementally. autoflush is off, so push pending
+    # writes first — priming the cache without earlier ledger rows would pin
+    # a stale balance for the rest of the transaction.
+    cached = session.info.get("_cash_balance")
+    if cached is not None:
+        return cached
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    balance = session.execute(select(func.coalesce(func.sum(CashLedger.delta), 0))).scalar_one()
+    session.info["_cash_balance"] = balance
+    return balance
+
+def get_portfolio_snapshot(session: Session) -> tuple[list[Position], Decimal]:
+    """Read all positions and the cash balance in one round trip.
+
+    The ledger sum rides along as a scalar subquery on the positions SELECT,
+    saving the separate aggregation query. autoflush is off on this
+    sessionmaker, so push any pending writes first — otherwise the subquery
+    misses ledger rows added earlier in the transaction. A balance already
+    cached on the session still wins, skipping the recompute.
+    """
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    cash_sq = select(func.coalesce(func.sum(CashLedger.delta), 0)).scalar_subquery()
+    rows = session.execute(select(Position, cash_sq).order_by(Position.ticker)).all()
+    positions = [r[0] for r in rows]
+    cash = session.info.get("_cash_balance")
+    if cash is None:
+        if rows:
+            cash = rows[0][1]
+        else:
+            cash = session.execute(select(func.coalesce(func.sum(CashLedger.delta), 0))).scalar_one()
+        session.info["_cash_balance"] = cash
+    return positions, cash
+
+
+def log_stop_loss_sells(session: Session, sells: list[dict]) -> None:
+    """Persist a batch of triggered stop-loss sells in three statements.
+
+    Each row dict carries ``ticker``, ``shares``, ``price`` and ``value``.
+    One executemany INSERT logs the trades (RETURNING their ids in parameter
+    order), one inserts the matching cash-ledger rows, and one DELETE drops
+    all sold positions — instead of two statements plus a flush per ticker.
+    """
+    if not sells:
+        return
+    trade_rows = [
+        {
+            "side": "SELL",
+            "ticker": s["ticker"],
+            "shares": s["shares"],
+            "price": s["price"],
+            "reason": "AUTOMATED SELL - STOPLOSS TRIGGERED",
+        }
+        for s in sells
+    ]
+    trade_ids = session.execute(
+        insert(Trade).returning(Trade.id, sort_by_parameter_order=True), trade_rows
+    ).scalars().all()
+    ledger_rows = [
+        {"delta": s["value"], "kind": "TRADE_PNL", "ref_trade_id": tid}
+        for s, tid in zip(sells, trade_ids)
+    ]
+    session.execute(insert(CashLedger), ledger_rows)
+    cached = session.info.get("_cash_balance")
+    if cached is not None:
+        session.info["_cash_balance"] = cached + sum(s["value"] for s in sells)
+    session.execute(delete(Position).where(Position.ticker.in_([s["ticker"] for s in sells])))
+    session.expire_all()
+
+
+# Equity history changes at most once per processing run but is read by every
+# dashboard poll; cache query results until the next write.  Keys are tagged
+# so the full-row and points variants don't collide.  Writers mark the
+# session dirty and the cache is cleared only after the transaction commits:
+# clearing at execute time would let a concurrent reader repopulate it from
+# a pre-commit snapshot and serve that stale series indefinitely.
+_equity_cache: dict[tuple, list] = {}
+_equity_cache_lock = threading.Lock()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _clear_equity_cache_after_commit(session: Session) -> None:
+    if session.info.pop("_equity_dirty", False):
+        with _equity_cache_lock:
+            _equity_cache.clear()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_equity_dirty_flag(session: Session) -> None:
+    session.info.pop("_equity_dirty", None)
+
 
 def upsert_equity(
     session: Session,
@@ -88,6 +203,7 @@ def upsert_equity(
         },
     )
     session.execute(stmt)
+    session.info["_equity_dirty"] = True
 
 
 def record_equity(
@@ -118,27 +234,82 @@ def record_equity(
     )
 
 
+def record_equity_many(session: Session, rows: list[dict]) -> None:
+    """Upsert many equity snapshots in one multi-VALUES statement.
+
+    Backfills used to pay one statement per day; SQLite accepts the bulk
+    ``INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE`` form directly.
+    Each row dict uses the :class:`EquityHistory` column names.
+    """
+    if not rows:
+        return
+    stmt = insert(EquityHistory).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EquityHistory.user_id, EquityHistory.date],
+        set_={
+            "portfolio_equity": stmt.excluded.portfolio_equity,
+            "benchmark_equity": stmt.excluded.benchmark_equity,
+            "process_type": stmt.excluded.process_type,
+            "is_final": stmt.excluded.is_final,
+        },
+    )
+    session.execute(stmt)
+    session.info["_equity_dirty"] = True
+
+
 def get_equity_series(
     session: Session,
     user_id: int,
     start: date | None = None,
     end: date | None = None,
 ) -> list[EquityHistory]:
+    key = ("rows", user_id, start, end)
+    with _equity_cache_lock:
+        cached = _equity_cache.get(key)
+    if cached is not None:
+        return cached
     stmt = select(EquityHistory).where(EquityHistory.user_id == user_id).order_by(EquityHistory.date)
     if start:
         stmt = stmt.where(EquityHistory.date >= start)
     if end:
         stmt = stmt.where(EquityHistory.date <= end)
-    return session.execute(stmt).scalars().all()
+    rows = session.execute(stmt).scalars().all()
+    with _equity_cache_lock:
+        _equity_cache[key] = rows
+    return rows
+
+
+def get_equity_points(session: Session, user_id: int) -> list[tuple[date, Decimal]]:
+    """Return (date, portfolio_equity) tuples for *user_id*, oldest first.
+
+    Column projection for the history endpoint: plain tuples skip the ORM
+    hydration that :func:`get_equity_series` pays for full rows.
+    """
+    key = ("points", user_id)
+    with _equity_cache_lock:
+        cached = _equity_cache.get(key)
+    if cached is not None:
+        return cached
+    stmt = (
+        select(EquityHistory.date, EquityHistory.portfolio_equity)
+        .where(EquityHistory.user_id == user_id)
+        .order_by(EquityHistory.date)
+    )
+    rows = [tuple(r) for r in session.execute(stmt)]
+    with _equity_cache_lock:
+        _equity_cache[key] = rows
+    return rows
 
 # Settings
 
 def set_setting(session: Session, key: str, value: str) -> None:
-    row = session.execute(select(Setting).where(Setting.key == key)).scalar_one_or_none()
-    if row:
-        row.value = value
-    else:
-        session.add(Setting(key=key, value=value))
+    stmt = insert(Setting).values(key=key, value=value)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Setting.key],
+        set_={"value": stmt.excluded.value},
+    )
+    session.execute(stmt)
+    session.expire_all()
 
 def get_setting(session: Session, key: str) -> str | None:
     row = session.execute(select(Setting).where(Setting.key == key)).scalar_one_or_none()
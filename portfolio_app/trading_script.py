@@ -1,12 +1,17 @@
 """Utilities for maintaining the ChatGPT micro cap portfolio backed by SQLite."""
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation, localcontext
 from typing import Any
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from cachetools import TTLCache
 
 from repo import (
     begin_tx,
@@ -16,10 +21,31 @@ from repo import (
     delete_position,
     log_trade,
     apply_cash,
+    log_stop_loss_sells,
     get_cash_balance,
+    get_portfolio_snapshot,
     record_equity,
 )
 
+# Trade rows only need micro-dollar precision.  Quantizing the binary float
+# directly skips the float->str->Decimal parse that used to run on every
+# share count and price in the trade paths.
+_Q6 = Decimal("0.000001")
+
+
+def _D(x: float) -> Decimal:
+    """Convert a float to a Decimal at six decimal places."""
+    try:
+        # The default 28-digit context can't quantize very large floats;
+        # widen it enough for any finite double (309 digits + 6 places).
+        with localcontext() as ctx:
+            ctx.prec = 320
+            return Decimal(x).quantize(_Q6)
+    except InvalidOperation as exc:
+        # e.g. infinity; surface as the input error the routes already handle.
+        raise ValueError(f"invalid numeric value: {x!r}") from exc
+
+
 COLUMNS = [
     "Date",
     "Ticker",
@@ -36,20 +62,90 @@ COLUMNS = [
 ]
 
 
+# Same-day bars are deterministic per fetch window, yet the manual-trade
+# validators and the valuation loop each re-downloaded them within a single
+# session.  A 15-minute in-process cache absorbs the repeats; recent yfinance
+# manages its own HTTP session, so caching happens here rather than by
+# injecting a requests_cache session.
+_history_cache: TTLCache = TTLCache(maxsize=1024, ttl=900)
+_history_cache_lock = threading.Lock()
+
+# Delisted or mistyped symbols come back empty every time; remember the
+# misses too so dead tickers stop costing a round-trip per run.
+_empty_until: dict[str, float] = {}
+
+
+def _daily_history(ticker: str) -> pd.DataFrame:
+    """Return the latest daily bar for *ticker*, cached for 15 minutes."""
+    with _history_cache_lock:
+        cached = _history_cache.get(ticker)
+        if cached is None and time.time() < _empty_until.get(ticker, 0):
+            return pd.DataFrame()
+    if cached is not None:
+        return cached
+    try:
+        data = yf.Ticker(ticker).history(period="1d")
+    except Exception:  # pragma: no cover - network errors
+        return pd.DataFrame()
+    if isinstance(data, pd.DataFrame) and not data.empty:
+        with _history_cache_lock:
+            _history_cache[ticker] = data
+        return data
+    with _history_cache_lock:
+        _empty_until[ticker] = time.time() + 900
+    return pd.DataFrame()
+
+
+def _fetch_daily_bars(tickers: list[str]) -> dict[str, pd.DataFrame]:
+    """Fetch the latest daily bar for many tickers in one yfinance request.
+
+    ``process_portfolio`` used to issue one ``yf.Ticker(...).history`` HTTPS
+    round-trip per position; a single grouped download collapses that to one.
+    Tickers with no data are left out so callers can fall back per ticker.
+    """
+    if not tickers:
+        return {}
+    try:
+        df = yf.download(
+            tickers, period="1d", group_by="ticker", threads=True, progress=False
+        )
+    except Exception:  # pragma: no cover - network errors
+        return {}
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return {}
+    out: dict[str, pd.DataFrame] = {}
+    for t in tickers:
+        if isinstance(df.columns, pd.MultiIndex):
+            if t not in df.columns.get_level_values(0):
+                continue
+            sub = df[t].dropna(how="all")
+        else:
+            # A single-ticker download comes back with flat columns.
+            sub = df.dropna(how="all")
+        if not sub.empty:
+            out[t] = sub
+    return out
+
+
 def _positions_df(session) -> pd.DataFrame:
     positions = get_positions(session)
-    rows = []
-    for p in positions:
-        rows.append(
-            {
-                "ticker": p.ticker,
-                "shares": float(p.shares),
-                "buy_price": float(p.avg_price),
-                "cost_basis": float(p.shares * p.avg_price),
-                "stop_loss": float(p.stop_loss or 0),
-            }
-        )
-    return pd.DataFrame(rows)
+    if not positions:
+        return pd.DataFrame()
+    n = len(positions)
+    # Columnar construction: typed float64 arrays and one vector multiply
+    # instead of a dict per row with Decimal arithmetic.
+    shares = np.fromiter((float(p.shares) for p in positions), dtype=np.float64, count=n)
+    buy_price = np.fromiter((float(p.avg_price) for p in positions), dtype=np.float64, count=n)
+    stop_loss = np.fromiter((float(p.stop_loss or 0) for p in positions), dtype=np.float64, count=n)
+    return pd.DataFrame(
+        {
+            "ticker": [p.ticker for p in positions],
+            "shares": shares,
+            "buy_price": buy_price,
+            "cost_basis": shares * buy_price,
+            "stop_loss": stop_loss,
+        }
+    )
 
 
 def load_latest_portfolio_state(file: str) -> tuple[pd.DataFrame | list[dict[str, Any]], float]:
@@ -59,19 +155,16 @@ def load_latest_portfolio_state(file: str) -> tuple[pd.DataFrame | list[dict[str
     return df, cash
 
 
-def log_manual_buy(
+def _apply_buy(
+    session,
     buy_price: float,
     shares: float,
     ticker: str,
     stoploss: float,
-    cash: float,
-    chatgpt_portfolio: pd.DataFrame,
     reason: str = "New position",
-) -> tuple[float, pd.DataFrame]:
-    try:
-        data = yf.Ticker(ticker).history(period="1d")
-    except Exception:  # pragma: no cover - network errors
-        data = pd.DataFrame()
+) -> None:
+    """Validate and record a buy on an existing session (no transaction)."""
+    data = _daily_history(ticker)
     if not data.empty:
         day_high = float(data["High"].iloc[-1])
         day_low = float(data["Low"].iloc[-1])
@@ -79,33 +172,87 @@ def log_manual_buy(
             raise ValueError(
                 f"Manual buy for {ticker} at {buy_price} failed: price outside today's range {round(day_low, 2)}-{round(day_high, 2)}."
             )
-    cost = Decimal(str(buy_price)) * Decimal(str(shares))
+    cost = _D(buy_price) * _D(shares)
+    cash_bal = get_cash_balance(session)
+    if cost > cash_bal:
+        raise ValueError(
+            f"Manual buy for {ticker} failed: cost {cost} exceeds cash balance {cash_bal}."
+        )
+    trade = log_trade(
+        session,
+        "BUY",
+        ticker,
+        _D(shares),
+        _D(buy_price),
+        reason=f"MANUAL BUY - {reason}",
+    )
+    apply_cash(session, -cost, "TRADE_PNL", trade.id)
+    pos = get_position(session, ticker)
+    if pos:
+        new_shares = pos.shares + _D(shares)
+        new_cost = pos.avg_price * pos.shares + cost
+        avg_price = new_cost / new_shares
+        upsert_position(session, ticker, new_shares, avg_price, _D(stoploss))
+    else:
+        upsert_position(session, ticker, _D(shares), _D(buy_price), _D(stoploss))
+
+
+def log_manual_buy(
+    buy_price: float,
+    shares: float,
+    ticker: str,
+    stoploss: float,
+    cash: float,
+    chatgpt_portfolio: pd.DataFrame,
+    reason: str = "New position",
+    need_df: bool = True,
+) -> tuple[float, pd.DataFrame | None]:
     with begin_tx() as session:
+        _apply_buy(session, buy_price, shares, ticker, stoploss, reason)
         cash_bal = get_cash_balance(session)
-        if cost > cash_bal:
+        # Callers that discard the snapshot skip the extra SELECT + DataFrame.
+        df = _positions_df(session) if need_df else None
+    return float(cash_bal), df
+
+
+def _apply_sell(
+    session,
+    sell_price: float,
+    shares_sold: float,
+    ticker: str,
+    reason: str = "No reason provided",
+) -> None:
+    """Validate and record a sell on an existing session (no transaction)."""
+    pos = get_position(session, ticker)
+    if pos is None:
+        raise ValueError(f"Manual sell for {ticker} failed: ticker not in portfolio.")
+    if _D(shares_sold) > pos.shares:
+        raise ValueError(
+            f"Manual sell for {ticker} failed: trying to sell {shares_sold} shares but only own {float(pos.shares)}."
+        )
+    data = _daily_history(ticker)
+    if not data.empty:
+        day_high = float(data["High"].iloc[-1])
+        day_low = float(data["Low"].iloc[-1])
+        if not (day_low <= sell_price <= day_high):
             raise ValueError(
-                f"Manual buy for {ticker} failed: cost {cost} exceeds cash balance {cash_bal}."
+                f"Manual sell for {ticker} at {sell_price} failed: price outside today's range {round(day_low, 2)}-{round(day_high, 2)}."
             )
-        trade = log_trade(
-            session,
-            "BUY",
-            ticker,
-            Decimal(str(shares)),
-            Decimal(str(buy_price)),
-            reason=f"MANUAL BUY - {reason}",
-        )
-        apply_cash(session, -cost, "TRADE_PNL", trade.id)
-        pos = get_position(session, ticker)
-        if pos:
-            new_shares = pos.shares + Decimal(str(shares))
-            new_cost = pos.avg_price * pos.shares + cost
-            avg_price = new_cost / new_shares
-            upsert_position(session, ticker, new_shares, avg_price, Decimal(str(stoploss)))
-        else:
-            upsert_position(session, ticker, Decimal(str(shares)), Decimal(str(buy_price)), Decimal(str(stoploss)))
-        cash_bal = get_cash_balance(session)
-        df = _positions_df(session)
-    return float(cash_bal), df
+    proceeds = _D(sell_price) * _D(shares_sold)
+    trade = log_trade(
+        session,
+        "SELL",
+        ticker,
+        _D(shares_sold),
+        _D(sell_price),
+        reason=f"MANUAL SELL - {reason}",
+    )
+    apply_cash(session, proceeds, "TRADE_PNL", trade.id)
+    remaining = pos.shares - _D(shares_sold)
+    if remaining <= 0:
+        delete_position(session, ticker)
+    else:
+        upsert_position(session, ticker, remaining, pos.avg_price, pos.stop_loss)
 
 
 def log_manual_sell(
@@ -115,43 +262,12 @@ def log_manual_sell(
     cash: float,
     chatgpt_portfolio: pd.DataFrame,
     reason: str = "No reason provided",
-) -> tuple[float, pd.DataFrame]:
+    need_df: bool = True,
+) -> tuple[float, pd.DataFrame | None]:
     with begin_tx() as session:
-        pos = get_position(session, ticker)
-        if pos is None:
-            raise ValueError(f"Manual sell for {ticker} failed: ticker not in portfolio.")
-        if Decimal(str(shares_sold)) > pos.shares:
-            raise ValueError(
-                f"Manual sell for {ticker} failed: trying to sell {shares_sold} shares but only own {float(pos.shares)}."
-            )
-        try:
-            data = yf.Ticker(ticker).history(period="1d")
-        except Exception:  # pragma: no cover - network errors
-            data = pd.DataFrame()
-        if not data.empty:
-            day_high = float(data["High"].iloc[-1])
-            day_low = float(data["Low"].iloc[-1])
-            if not (day_low <= sell_price <= day_high):
-                raise ValueError(
-                    f"Manual sell for {ticker} at {sell_price} failed: price outside today's range {round(day_low, 2)}-{round(day_high, 2)}."
-                )
-        proceeds = Decimal(str(sell_price)) * Decimal(str(shares_sold))
-        trade = log_trade(
-            session,
-            "SELL",
-            ticker,
-            Decimal(str(shares_sold)),
-            Decimal(str(sell_price)),
-            reason=f"MANUAL SELL - {reason}",
-        )
-        apply_cash(session, proceeds, "TRADE_PNL", trade.id)
-        remaining = pos.shares - Decimal(str(shares_sold))
-        if remaining <= 0:
-            delete_position(session, ticker)
-        else:
-            upsert_position(session, ticker, remaining, pos.avg_price, pos.stop_loss)
+        _apply_sell(session, sell_price, shares_sold, ticker, reason)
         cash_bal = get_cash_balance(session)
-        df = _positions_df(session)
+        df = _positions_df(session) if need_df else None
     return float(cash_bal), df
 
 
@@ -162,7 +278,25 @@ def process_portfolio(
     user_id: int = 1,
 ) -> tuple[pd.DataFrame, float]:
     if manual_trades:
-        for trade in manual_trades:
+        # Warm the daily-bar cache for every ticker up front so the
+        # validators below hit memory instead of issuing one serial HTTPS
+        # round-trip per trade.
+        trade_tickers = {str(t.get("ticker", "")).upper() for t in manual_trades}
+        trade_tickers.discard("")
+        if len(trade_tickers) > 1:
+            with ThreadPoolExecutor(max_workers=8) as ex:
+                list(ex.map(_daily_history, trade_tickers))
+
+    now = datetime.today()
+    today = now.strftime("%Y-%m-%d")
+
+    results: list[tuple] = []
+    triggered: list[dict[str, Any]] = []
+    # One transaction covers the manual trades and the position walk: a
+    # single WAL commit instead of one per trade. The validators raise
+    # before touching the session, so skipping a bad trade is safe.
+    with begin_tx() as session:
+        for trade in manual_trades or []:
             action = str(trade.get("action", "")).lower()
             ticker = str(trade.get("ticker", "")).upper()
             try:
@@ -174,109 +308,87 @@ def process_portfolio(
                 if action == "b":
                     stop_loss = float(trade.get("stop_loss", 0) or 0)
                     reason = str(trade.get("reason", "")).strip() or "New position"
-                    cash, _ = log_manual_buy(price, shares, ticker, stop_loss, cash, pd.DataFrame(), reason)
+                    _apply_buy(session, price, shares, ticker, stop_loss, reason)
                 elif action == "s":
                     reason = str(trade.get("reason", "")).strip() or "No reason provided"
-                    cash, _ = log_manual_sell(price, shares, ticker, cash, pd.DataFrame(), reason)
+                    _apply_sell(session, price, shares, ticker, reason)
             except ValueError:
                 continue
-
-    today = datetime.today().strftime("%Y-%m-%d")
-
-    results: list[dict[str, Any]] = []
-    total_value = Decimal("0")
-    total_pnl = Decimal("0")
-    with begin_tx() as session:
-        positions = get_positions(session)
-        for pos in positions:
-            ticker = pos.ticker
-            shares = float(pos.shares)
-            buy_price = float(pos.avg_price)
-            cost_basis = buy_price * shares
-            stop = float(pos.stop_loss or 0)
-            try:
-                data = yf.Ticker(ticker).history(period="1d")
-            except Exception:  # pragma: no cover - network errors
-                data = pd.DataFrame()
-            if data.empty:
-                row = {
-                    "Date": today,
-                    "Ticker": ticker,
-                    "Shares": shares,
-                    "Buy Price": buy_price,
-                    "Cost Basis": cost_basis,
-                    "Stop Loss": stop,
-                    "Current Price": "",
-                    "Total Value": "",
-                    "PnL": "",
-                    "Action": "NO DATA",
-                    "Cash Balance": "",
-                    "Total Equity": "",
-                }
+        # autoflush is off: push pending trade writes (notably position
+        # deletes from full sells) to SQLite so the snapshot below doesn't
+        # re-value positions that were just sold.
+        session.flush()
+        positions, _ = get_portfolio_snapshot(session)
+        tickers = [pos.ticker for pos in positions]
+        bars = _fetch_daily_bars(tickers)
+        n = len(positions)
+        shares_arr = np.fromiter((float(p.shares) for p in positions), np.float64, count=n)
+        buy_arr = np.fromiter((float(p.avg_price) for p in positions), np.float64, count=n)
+        stop_arr = np.fromiter((float(p.stop_loss or 0) for p in positions), np.float64, count=n)
+        low_arr = np.full(n, np.nan)
+        close_arr = np.full(n, np.nan)
+        for i, ticker in enumerate(tickers):
+            data = bars.get(ticker)
+            if data is None:
+                data = _daily_history(ticker)
+            if not data.empty:
+                # Positional ndarray read skips the Series/.iloc scalar boxing.
+                last_bar = data[["Low", "Close"]].to_numpy()[-1]
+                low_arr[i] = last_bar[0]
+                close_arr[i] = last_bar[1]
+        # Stop-loss detection and valuation as whole-array ops; only rows
+        # that actually triggered go back through Python.
+        has_data = ~np.isnan(close_arr)
+        stop_hit = has_data & (stop_arr > 0) & (low_arr <= stop_arr)
+        hold = has_data & ~stop_hit
+        cost_arr = buy_arr * shares_arr
+        price_arr = np.where(stop_hit, stop_arr, close_arr)
+        value_arr = price_arr * shares_arr
+        pnl_arr = (price_arr - buy_arr) * shares_arr
+        total_value = _D(float(value_arr[hold].sum())) if n else Decimal("0")
+        total_pnl = _D(float(pnl_arr[hold].sum())) if n else Decimal("0")
+        for i, ticker in enumerate(tickers):
+            if not has_data[i]:
+                # Rows are tuples in COLUMNS order; from_records below skips
+                # the per-row dict hashing and column reordering.
+                row = (today, ticker, float(shares_arr[i]), float(buy_arr[i]),
+                       float(cost_arr[i]), float(stop_arr[i]),
+                       "", "", "", "NO DATA", "", "")
             else:
-                low_price = float(data["Low"].iloc[-1])
-                close_price = float(data["Close"].iloc[-1])
-                if stop and low_price <= stop:
-                    price = stop
-                    value = price * shares
-                    pnl = (price - buy_price) * shares
-                    trade = log_trade(
-                        session,
-                        "SELL",
-                        ticker,
-                        Decimal(str(shares)),
-                        Decimal(str(price)),
-                        reason="AUTOMATED SELL - STOPLOSS TRIGGERED",
+                if stop_hit[i]:
+                    triggered.append(
+                        {
+                            "ticker": ticker,
+                            "shares": _D(float(shares_arr[i])),
+                            "price": _D(float(price_arr[i])),
+                            "value": _D(float(value_arr[i])),
+                        }
                     )
-                    apply_cash(session, Decimal(str(value)), "TRADE_PNL", trade.id)
-                    delete_position(session, ticker)
                     action = "SELL - Stop Loss Triggered"
                 else:
-                    price = close_price
-                    value = price * shares
-                    pnl = (price - buy_price) * shares
-                    total_value += Decimal(str(value))
-                    total_pnl += Decimal(str(pnl))
                     action = "HOLD"
-                row = {
-                    "Date": today,
-                    "Ticker": ticker,
-                    "Shares": shares,
-                    "Buy Price": buy_price,
-                    "Cost Basis": cost_basis,
-                    "Stop Loss": stop,
-                    "Current Price": price,
-                    "Total Value": value,
-                    "PnL": pnl,
-                    "Action": action,
-                    "Cash Balance": "",
-                    "Total Equity": "",
-                }
+                row = (today, ticker, float(shares_arr[i]), float(buy_arr[i]),
+                       float(cost_arr[i]), float(stop_arr[i]),
+                       float(price_arr[i]), float(value_arr[i]),
+                       float(pnl_arr[i]), action, "", "")
             results.append(row)
+        log_stop_loss_sells(session, triggered)
         final_cash = get_cash_balance(session)
-        total_row = {
-            "Date": today,
-            "Ticker": "TOTAL",
-            "Shares": "",
-            "Buy Price": "",
-            "Cost Basis": "",
-            "Stop Loss": "",
-            "Current Price": "",
-            "Total Value": round(float(total_value), 2),
-            "PnL": round(float(total_pnl), 2),
-            "Action": "",
-            "Cash Balance": round(float(final_cash), 2),
-            "Total Equity": round(float(total_value + final_cash), 2),
-        }
+        total_row = (today, "TOTAL", "", "", "", "", "",
+                     round(float(total_value), 2),
+                     round(float(total_pnl), 2),
+                     "",
+                     round(float(final_cash), 2),
+                     round(float(total_value + final_cash), 2))
         results.append(total_row)
         record_equity(
             session,
-            datetime.today().date(),
+            now.date(),
             total_value + final_cash,
             user_id=user_id,
         )
         portfolio_df = _positions_df(session)
-    df = pd.DataFrame(results)[COLUMNS]
+    df = pd.DataFrame.from_records(results, columns=COLUMNS)
     return portfolio_df, float(final_cash)
 
 import pandas as pd
@@ -324,14 +436,12 @@ def daily_results(chatgpt_portfolio: pd.DataFrame) -> dict:
                 price_rows.append([ticker, "—", "—", "—"])
                 continue
 
-            close_now = data["Close"].iloc[-1]
-            close_prev = data["Close"].iloc[-2]
-            vol_now = data["Volume"].iloc[-1]
-
-            # Safe cast
-            close_now = float(getattr(close_now, "item", lambda: close_now)())
-            close_prev = float(getattr(close_prev, "item", lambda: close_prev)())
-            vol_now = float(getattr(vol_now, "item", lambda: vol_now)())
+            # Flattened ndarray reads work for both flat and MultiIndex
+            # columns, replacing the per-scalar getattr("item") dance.
+            closes = np.asarray(data["Close"]).ravel()
+            close_now = float(closes[-1])
+            close_prev = float(closes[-2])
+            vol_now = float(np.asarray(data["Volume"]).ravel()[-1])
 
             pct = ((close_now - close_prev) / close_prev) * 100.0
             price_rows.append([
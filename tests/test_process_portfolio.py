@@ -0,0 +1,92 @@
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "portfolio_app"))
+
+# test_price_fallback stubs trading_script before importing the app; this
+# file exercises the real module, so drop any stub first.
+sys.modules.pop("trading_script", None)
+
+import db
+import models
+import repo
+import trading_script as ts
+from sqlalchemy import create_engine, select
+
+
+@pytest.fixture()
+def fresh_db(tmp_path):
+    # Rebind the shared scoped session to a throwaway database; the module
+    # engine resolves its relative path at import, so swapping cwd is not
+    # enough.
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", future=True)
+    db.Base.metadata.create_all(bind=engine)
+    db.SessionLocal.remove()
+    db.SessionLocal.session_factory.configure(bind=engine)
+    yield
+    db.SessionLocal.remove()
+    db.SessionLocal.session_factory.configure(bind=db.engine)
+    engine.dispose()
+
+
+def test_manual_sell_then_stop_loss_single_run(fresh_db, monkeypatch):
+    """A position fully sold manually must not be re-valued or stop-sold."""
+    bar = pd.DataFrame({"High": [2.5], "Low": [1.5], "Close": [2.0]})
+    monkeypatch.setattr(ts, "_fetch_daily_bars", lambda tickers: {"ABC": bar})
+    monkeypatch.setattr(ts, "_daily_history", lambda ticker: bar)
+
+    with repo.begin_tx() as session:
+        repo.apply_cash(session, Decimal("100"), "DEPOSIT")
+        repo.upsert_position(session, "ABC", Decimal("10"), Decimal("1"), Decimal("2.6"))
+
+    manual_trades = [
+        {"action": "s", "ticker": "ABC", "shares": 10, "price": 2.0, "reason": "exit"}
+    ]
+    portfolio_df, cash = ts.process_portfolio(pd.DataFrame(), 100.0, manual_trades)
+
+    assert cash == 120.0
+    assert portfolio_df.empty
+
+    with repo.begin_tx() as session:
+        trades = session.execute(select(models.Trade)).scalars().all()
+        assert [t.side for t in trades] == ["SELL"]
+        assert repo.get_positions(session) == []
+        assert float(repo.get_cash_balance(session)) == 120.0
+        equity = session.execute(select(models.EquityHistory)).scalars().one()
+        assert float(equity.portfolio_equity) == 120.0
+
+
+def test_manual_sell_then_buy_single_run(fresh_db, monkeypatch):
+    """A buy's affordability check must see the preceding sell's proceeds."""
+    bars = {
+        "ABC": pd.DataFrame({"High": [2.5], "Low": [1.5], "Close": [2.0]}),
+        "XYZ": pd.DataFrame({"High": [1.2], "Low": [0.8], "Close": [1.0]}),
+    }
+    monkeypatch.setattr(ts, "_fetch_daily_bars", lambda tickers: bars)
+    monkeypatch.setattr(ts, "_daily_history", lambda ticker: bars[ticker])
+
+    with repo.begin_tx() as session:
+        repo.apply_cash(session, Decimal("100"), "DEPOSIT")
+        repo.upsert_position(session, "ABC", Decimal("10"), Decimal("1"), None)
+
+    manual_trades = [
+        {"action": "s", "ticker": "ABC", "shares": 10, "price": 2.0, "reason": "exit"},
+        {"action": "b", "ticker": "XYZ", "shares": 10, "price": 1.0, "reason": "rotate"},
+    ]
+    portfolio_df, cash = ts.process_portfolio(pd.DataFrame(), 100.0, manual_trades)
+
+    # 100 + 20 sell proceeds - 10 buy cost
+    assert cash == 110.0
+    assert list(portfolio_df["ticker"]) == ["XYZ"]
+
+    with repo.begin_tx() as session:
+        assert float(repo.get_cash_balance(session)) == 110.0
+        equity = session.execute(select(models.EquityHistory)).scalars().one()
+        # XYZ marked to its 1.0 close plus cash
+        assert float(equity.portfolio_equity) == 120.0